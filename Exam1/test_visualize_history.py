@@ -0,0 +1,124 @@
+import os
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")  # before visualize_history imports pyplot
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import visualize_history as vh
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+requires_pyarrow = pytest.mark.skipif(vh.pa is None, reason="pyarrow not installed")
+
+
+ROWS = [
+    "Date,Open,High,Low,Close,Adj Close,Volume,Symbol",
+    "2020-01-02,1,1,1,10,10,100,AAPL",
+    "bad-date,1,1,1,11,11,100,AAPL",
+    "2020-01-03,1,1,1,12,12,100,AAPL",
+    "2020-01-02,1,1,1,50,50,100,LMT",
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "history.csv"
+    path.write_text("\n".join(ROWS) + "\n")
+    return str(path)
+
+
+@pytest.fixture(params=["arrow", "pandas"])
+def reader(request, monkeypatch):
+    if request.param == "arrow" and vh.pa is None:
+        pytest.skip("pyarrow not installed")
+    if request.param == "pandas":
+        monkeypatch.setattr(vh, "pa", None)
+    return request.param
+
+
+def test_load_symbol_frame_drops_malformed_dates(csv_path, reader):
+    df = vh.load_symbol_frame(csv_path, "AAPL")
+    assert [d.strftime("%Y-%m-%d") for d in df.index] == ["2020-01-02", "2020-01-03"]
+    assert df["Close"].tolist() == [10.0, 12.0]
+
+
+@requires_pyarrow
+def test_prepare_drops_malformed_dates(csv_path):
+    vh.ensure_parquet(csv_path)
+    df = vh.load_symbol_frame(csv_path, "AAPL")
+    assert df["Close"].tolist() == [10.0, 12.0]
+    assert vh.list_available_symbols(csv_path) == ["AAPL", "LMT"]
+
+
+@requires_pyarrow
+def test_prepare_overwrite_drops_removed_tickers(csv_path):
+    vh.ensure_parquet(csv_path)
+    with open(csv_path, "w") as f:
+        f.write("\n".join(r for r in ROWS if not r.endswith("LMT")) + "\n")
+
+    vh.ensure_parquet(csv_path, overwrite=True)
+    assert vh.list_available_symbols(csv_path) == ["AAPL"]
+    with pytest.raises(ValueError):
+        vh.load_symbol_frame(csv_path, "LMT")
+    assert not vh.parquet_path_for(csv_path).with_suffix(".parquet.tmp").exists()
+
+
+@requires_pyarrow
+def test_prepare_writes_full_row_groups(tmp_path, monkeypatch):
+    rows = [ROWS[0]] + [
+        f"2020-01-{d:02d},1,1,1,{d},{d},100,{sym}"
+        for d in range(1, 29)
+        for sym in ("AAPL", "LMT", "MSFT")
+    ] * 20
+    path = tmp_path / "history.csv"
+    path.write_text("\n".join(rows) + "\n")
+    monkeypatch.setattr(vh, "ARROW_BLOCK_SIZE", 1 << 10)  # many small input batches
+
+    out = vh.ensure_parquet(str(path))
+    for part in sorted((tmp_path / "history.parquet").glob("Symbol=*/*.parquet")):
+        assert pq.ParquetFile(part).metadata.num_row_groups == 1
+    assert out.endswith("history.parquet")
+
+
+@requires_pyarrow
+def test_stale_parquet_falls_back_to_csv(csv_path):
+    vh.ensure_parquet(csv_path)
+    with open(csv_path, "a") as f:
+        f.write("2020-01-06,1,1,1,13,13,100,AAPL\n")
+    dataset_mtime = vh.parquet_path_for(csv_path).stat().st_mtime
+    os.utime(csv_path, (dataset_mtime + 10, dataset_mtime + 10))
+
+    df = vh.load_symbol_frame(csv_path, "AAPL")
+    assert df["Close"].tolist() == [10.0, 12.0, 13.0]
+
+
+@pytest.mark.parametrize(
+    "close",
+    [[float("nan")] * 3, [10.0]],
+    ids=["all-nan-close", "single-row"],
+)
+def test_plot_history_edge_frames(close):
+    df = pd.DataFrame(
+        {"Close": close, "Volume": [100.0] * len(close)},
+        index=pd.date_range("2020-01-02", periods=len(close), name="Date"),
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert vh.plot_history(df, "AAPL", show=False) is None
+
+
+def test_moving_averages_accepts_any_iterable():
+    close = np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0])
+    out = vh.moving_averages(close, (w for w in (1, 3)))
+    expected = np.column_stack(
+        [pd.Series(close).rolling(w, min_periods=1).mean() for w in (1, 3)]
+    )
+    np.testing.assert_allclose(out, expected)
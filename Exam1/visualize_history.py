@@ -16,17 +16,37 @@ Examples:
   # Plot AAPL for 2020-01-01 to 2024-12-31 and save PNG
   python visualize_history.py --csv history.csv --symbol AAPL --start 2020-01-01 --end 2024-12-31 --save
 
-Tip: On very large files, add --fast to downsample to business-day means.
+  # Save charts for several symbols in one batch (reuses a single figure)
+  python visualize_history.py --csv history.csv --symbol AAPL LMT --save --no-show
+
+  # One-time: partition the CSV by symbol into history.parquet (needs pyarrow)
+  python visualize_history.py --csv history.csv --prepare
+
+Tip: On very large files, add --fast to downsample to business-day means,
+and run --prepare once so later reads skip the full CSV scan.
 """
 
 from __future__ import annotations
 import argparse
 import os
+import shutil
 from pathlib import Path
 from typing import Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import csv as pacsv
+except ImportError:  # fall back to chunked pandas reads
+    pa = None
 
 
 # ---------------------------
@@ -38,16 +58,124 @@ DTYPE = {
     "Open": "float64", "High": "float64", "Low": "float64",
     "Close": "float64", "Adj Close": "float64",
     "Volume": "float64",   # volume may exceed int32; keep as float for safety
-    "Symbol": "string",
+    "Symbol": "category",  # equality becomes an integer code compare
 }
+DATE_FORMAT = "%Y-%m-%d"
+ARROW_BLOCK_SIZE = 8 << 20  # bytes per streamed record batch
+PARQUET_ROW_GROUP_SIZE = 200_000
+
+
+def _open_arrow_csv(csv_path: str, columns: List[str]):
+    """Stream the CSV as Arrow record batches (multi-threaded C++ tokenizer).
+
+    Date is read as text and parsed per batch, so malformed dates become nulls
+    (dropped later, like ``errors="coerce"``) instead of failing the whole read.
+    """
+    column_types = {
+        "Date": pa.string(),
+        **{c: pa.float64() for c in USECOLS if DTYPE.get(c) == "float64"},
+        "Symbol": pa.string(),
+    }
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: t for c, t in column_types.items() if c in columns},
+            include_columns=columns,
+        ),
+    )
+    if "Date" not in columns:
+        return reader
+
+    i = reader.schema.get_field_index("Date")
+    schema = reader.schema.set(i, pa.field("Date", pa.timestamp("ns")))
+
+    def parse_dates():
+        for batch in reader:
+            dates = pc.strptime(
+                batch.column(i), format=DATE_FORMAT, unit="ns", error_is_null=True
+            )
+            yield pa.RecordBatch.from_arrays(
+                [dates if j == i else col for j, col in enumerate(batch.columns)],
+                schema=schema,
+            )
+
+    return pa.RecordBatchReader.from_batches(schema, parse_dates())
+
+
+def parquet_path_for(csv_path: str) -> Path:
+    """Sibling directory holding the symbol-partitioned Parquet dataset."""
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def _symbol_partitioning():
+    # Explicit string type so numeric-looking tickers are not inferred as ints
+    return ds.partitioning(pa.schema([("Symbol", pa.string())]), flavor="hive")
+
+
+def _open_parquet_dataset(csv_path: str):
+    """Return the Parquet dataset next to csv_path, or None if not prepared or stale."""
+    path = parquet_path_for(csv_path)
+    if pa is None or not path.is_dir():
+        return None
+    if os.path.getmtime(csv_path) > path.stat().st_mtime:
+        print(f"[warn] {csv_path} is newer than {path}; reading the CSV (re-run --prepare)")
+        return None
+    return ds.dataset(path, format="parquet", partitioning=_symbol_partitioning())
+
+
+def ensure_parquet(csv_path: str, overwrite: bool = False) -> str:
+    """Stream the CSV once into a Parquet dataset partitioned by Symbol."""
+    if pa is None:
+        raise RuntimeError("pyarrow is required to build the Parquet dataset")
+    path = parquet_path_for(csv_path)
+    if path.is_dir() and not overwrite:
+        return str(path)
+    # Build into a fresh sibling and swap it in, so partitions of tickers that
+    # left the CSV don't survive a rebuild and a failed build leaves the old one
+    tmp_path = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    ds.write_dataset(
+        _open_arrow_csv(csv_path, USECOLS),
+        tmp_path,
+        format="parquet",
+        partitioning=_symbol_partitioning(),
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+        # Buffer each partition up to a full row group; otherwise every input
+        # batch is flushed per symbol as its own tiny row group
+        min_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+        max_rows_per_group=PARQUET_ROW_GROUP_SIZE,
+    )
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.rename(path)
+    os.utime(path)  # mark the dataset as built now, for the staleness check
+    return str(path)
+
 
 def list_available_symbols(csv_path: str, chunksize: int = 500_000) -> List[str]:
     symbols = set()
-    for chunk in pd.read_csv(
-        csv_path, usecols=["Symbol"], dtype={"Symbol": "string"},
-        chunksize=chunksize, low_memory=True
-    ):
-        symbols.update(chunk["Symbol"].dropna().unique().tolist())
+    dataset = _open_parquet_dataset(csv_path)
+    if dataset is not None:
+        # One partition directory per symbol; no data pages are read
+        for fragment in dataset.get_fragments():
+            keys = ds.get_partition_keys(fragment.partition_expression)
+            symbols.add(keys.get("Symbol"))
+    elif pa is not None:
+        # Unique per Arrow batch, then merge once
+        uniques = [
+            pc.unique(batch.column("Symbol"))
+            for batch in _open_arrow_csv(csv_path, ["Symbol"])
+        ]
+        if uniques:
+            symbols.update(pc.unique(pa.chunked_array(uniques)).drop_null().to_pylist())
+    else:
+        for chunk in pd.read_csv(
+            csv_path, usecols=["Symbol"], dtype={"Symbol": "category"},
+            chunksize=chunksize, low_memory=True
+        ):
+            # Categories are already the chunk's unique non-null symbols
+            symbols.update(chunk["Symbol"].cat.categories.tolist())
     syms = sorted(s for s in symbols if s)
     return syms
 
@@ -59,29 +187,57 @@ def load_symbol_frame(
     end: Optional[str] = None,
     chunksize: int = 500_000,
 ) -> pd.DataFrame:
-    frames = []
-    for chunk in pd.read_csv(
-        csv_path, usecols=USECOLS, dtype=DTYPE, chunksize=chunksize, low_memory=True
-    ):
-        # Filter symbol within chunk
-        c = chunk[chunk["Symbol"] == symbol]
-        if not c.empty:
-            frames.append(c)
-
-    if not frames:
-        raise ValueError(f"No rows found for symbol '{symbol}' in {csv_path}")
-
-    df = pd.concat(frames, ignore_index=True)
-
-    # Parse dates, sort, and de-dup just in case
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce", utc=False)
+    dataset = _open_parquet_dataset(csv_path)
+    if dataset is not None:
+        # Partition + row-group pruning: only the symbol's files are opened
+        expr = ds.field("Symbol") == symbol
+        if start:
+            expr &= ds.field("Date") >= pd.Timestamp(start)
+        if end:
+            expr &= ds.field("Date") <= pd.Timestamp(end)
+        table = dataset.to_table(columns=USECOLS, filter=expr)
+        if table.num_rows == 0:
+            raise ValueError(f"No rows found for symbol '{symbol}' in {parquet_path_for(csv_path)}")
+        df = table.to_pandas()
+    elif pa is not None:
+        # Filter symbol within each Arrow batch; Date is already parsed by Arrow
+        batches = [
+            batch.filter(pc.equal(batch.column("Symbol"), symbol))
+            for batch in _open_arrow_csv(csv_path, USECOLS)
+        ]
+        table = pa.Table.from_batches(batches) if batches else None
+        if table is None or table.num_rows == 0:
+            raise ValueError(f"No rows found for symbol '{symbol}' in {csv_path}")
+        df = table.to_pandas()
+    else:
+        frames = []
+        for chunk in pd.read_csv(
+            csv_path, usecols=USECOLS, dtype=DTYPE, chunksize=chunksize, low_memory=True,
+            parse_dates=["Date"], date_format=DATE_FORMAT,
+        ):
+            # Filter symbol within chunk by category code
+            codes = chunk["Symbol"].cat.codes
+            try:
+                c = chunk[codes == chunk["Symbol"].cat.categories.get_loc(symbol)]
+            except KeyError:
+                continue  # symbol absent from this chunk
+            if not c.empty:
+                frames.append(c)
+
+        if not frames:
+            raise ValueError(f"No rows found for symbol '{symbol}' in {csv_path}")
+
+        df = pd.concat(frames, ignore_index=True)
+
+    # Parse dates (no-op if already parsed on read), sort, and de-dup just in case
+    df["Date"] = pd.to_datetime(df["Date"], format=DATE_FORMAT, errors="coerce", cache=True)
     df = df.dropna(subset=["Date"]).sort_values("Date").drop_duplicates(subset=["Date"])
 
-    # Filter date range
-    if start:
-        df = df[df["Date"] >= pd.to_datetime(start)]
-    if end:
-        df = df[df["Date"] <= pd.to_datetime(end)]
+    # Filter date range: Date is sorted now, so binary-search the bounds and slice
+    dates = df["Date"].to_numpy()
+    i0 = dates.searchsorted(pd.to_datetime(start).to_datetime64(), side="left") if start else 0
+    i1 = dates.searchsorted(pd.to_datetime(end).to_datetime64(), side="right") if end else len(dates)
+    df = df.iloc[i0:i1]
 
     if df.empty:
         raise ValueError(
@@ -97,6 +253,55 @@ def load_symbol_frame(
 # Plotting
 # ---------------------------
 
+MAX_PLOT_POINTS = 5000  # above this, line series are LTTB-downsampled
+
+
+def lttb(x_ns: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of n_out points preserving the line's shape."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = (x_ns - x_ns[0]).astype(np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=float(np.nanmean(y)))
+
+    # First and last points are kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sel = np.empty(n_out, dtype=np.int64)
+    sel[0], sel[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # Pick the point forming the largest triangle with the previous pick and next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        sel[i + 1] = a
+    return sel
+
+
+def moving_averages(values: np.ndarray, windows: Iterable[int]) -> np.ndarray:
+    """Trailing means for every window from one cumulative-sum pass.
+
+    Matches ``Series.rolling(w, min_periods=1).mean()``: NaNs are skipped and
+    the first w-1 rows average over the shorter expanding window.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    windows = list(windows)
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    ccnt = np.concatenate(([0], np.cumsum(valid)))
+    ends = np.arange(1, len(values) + 1)
+    out = np.empty((len(values), len(windows)))
+    for j, w in enumerate(windows):
+        starts = np.maximum(ends - w, 0)
+        cnt = ccnt[ends] - ccnt[starts]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, j] = np.where(cnt > 0, (csum[ends] - csum[starts]) / cnt, np.nan)
+    return out
+
+
 def plot_history(
     df: pd.DataFrame,
     symbol: str,
@@ -105,7 +310,10 @@ def plot_history(
     show: bool = True,
     ma_windows: Iterable[int] = (20, 50, 200),
     fast: bool = False,
+    fig: Optional[plt.Figure] = None,
 ) -> Optional[str]:
+    """Plot one symbol. Pass ``fig`` to redraw into an existing figure (batch use);
+    the caller then owns it and it is not closed here."""
     # Optional downsample for speed on giant frames
     if fast:
         # Business-day frequency average
@@ -113,27 +321,63 @@ def plot_history(
     else:
         df_plot = df
 
-    # Compute moving averages
-    for w in ma_windows:
-        df_plot[f"MA{w}"] = df_plot["Close"].rolling(w, min_periods=1).mean()
-
-    # Build figure: price on top, volume below (shared x)
-    fig = plt.figure(figsize=(12, 7))
-    ax_price = fig.add_axes([0.08, 0.35, 0.88, 0.58])  # [left, bottom, width, height]
-    ax_vol = fig.add_axes([0.08, 0.10, 0.88, 0.20], sharex=ax_price)
-
-    # Price lines
-    ax_price.plot(df_plot.index, df_plot["Close"], label="Close", linewidth=1.2)
-    for w in ma_windows:
-        ax_price.plot(df_plot.index, df_plot[f"MA{w}"], label=f"MA{w}", linewidth=1.0)
+    # Build figure: price on top, volume below (shared x), or clear and reuse the caller's
+    own_fig = fig is None
+    if own_fig:
+        fig = plt.figure(figsize=(12, 7))
+    if len(fig.axes) >= 2:
+        ax_price, ax_vol = fig.axes[:2]
+        ax_price.cla()
+        ax_vol.cla()
+    else:
+        ax_price = fig.add_axes([0.08, 0.35, 0.88, 0.58])  # [left, bottom, width, height]
+        ax_vol = fig.add_axes([0.08, 0.10, 0.88, 0.20], sharex=ax_price)
+
+    # Plain datetime64 x values skip pandas' slow DatetimeIndex converter path
+    idx = df_plot.index
+    if idx.tz is not None:
+        idx = idx.tz_convert(None)
+    x = idx.values.astype("datetime64[ns]")
+    close = df_plot["Close"].to_numpy(dtype=np.float64)
+    ma_windows = list(ma_windows)
+    mas = moving_averages(close, ma_windows)
+    if len(x) > MAX_PLOT_POINTS:
+        sel = lttb(x.astype(np.int64), close, MAX_PLOT_POINTS)
+    else:
+        sel = slice(None)
+
+    # Price lines: Close + every MA as one LineCollection (one unit conversion, one draw)
+    labels = ["Close"] + [f"MA{w}" for w in ma_windows]
+    ys = np.column_stack([close, mas])[sel]
+    xnum = mdates.date2num(x)
+    xn = xnum[sel]
+    segments = np.stack([np.broadcast_to(xn, ys.T.shape), ys.T], axis=-1)
+    cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    colors = [cycle[i % len(cycle)] for i in range(len(labels))]
+    widths = [1.2] + [1.0] * (len(labels) - 1)
+    ax_price.add_collection(LineCollection(segments, colors=colors, linewidths=widths))
+    ax_price.xaxis_date()
+    # Collections don't autoscale; set limits from the data explicitly
+    if xn[0] == xn[-1]:
+        ax_price.set_xlim(xn[0] - 1, xn[-1] + 1)  # single day: pad a day each side
+    else:
+        ax_price.set_xlim(xn[0], xn[-1])
+    finite = ys[np.isfinite(ys)]
+    if finite.size:  # all-NaN Close: leave the default y range
+        lo, hi = finite.min(), finite.max()
+        pad = 0.05 * (hi - lo) or 1.0
+        ax_price.set_ylim(lo - pad, hi + pad)
 
     ax_price.set_title(f"{symbol} — Close & Moving Averages")
     ax_price.set_ylabel("Price")
-    ax_price.legend(loc="upper left")
+    handles = [Line2D([], [], color=c, linewidth=lw) for c, lw in zip(colors, widths)]
+    ax_price.legend(handles, labels, loc="upper left")
     ax_price.grid(True, alpha=0.25)
 
-    # Volume bars
-    ax_vol.bar(df_plot.index, df_plot["Volume"].fillna(0.0), width=1.0)
+    # Volume as one filled step polygon instead of a Rectangle patch per bar
+    volume = df_plot["Volume"].fillna(0.0).to_numpy(dtype=np.float64)
+    ax_vol.fill_between(xnum, 0.0, volume, step="mid", linewidth=0)
+    ax_vol.set_ylim(bottom=0)
     ax_vol.set_ylabel("Volume")
     ax_vol.grid(True, axis="y", alpha=0.25)
 
@@ -153,7 +397,7 @@ def plot_history(
 
     if show:
         plt.show()
-    else:
+    elif own_fig:
         plt.close(fig)
 
     return str(saved_path) if saved_path else None
@@ -169,9 +413,12 @@ def build_parser() -> argparse.ArgumentParser:
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
     )
     p.add_argument("--csv", required=True, help="Path to history.csv")
-    p.add_argument("--symbol", help="Ticker symbol to plot (e.g., AAPL)")
+    p.add_argument("--symbol", nargs="+",
+                   help="Ticker symbol(s) to plot (e.g., AAPL or AAPL LMT)")
     p.add_argument("--start", help="Start date (YYYY-MM-DD)")
     p.add_argument("--end", help="End date (YYYY-MM-DD)")
+    p.add_argument("--prepare", action="store_true",
+                   help="Partition the CSV by symbol into a sibling .parquet dataset (needs pyarrow)")
     p.add_argument("--list-symbols", action="store_true", help="List available symbols and exit")
     p.add_argument("--outdir", default="charts", help="Directory to save charts")
     p.add_argument("--save", action="store_true", help="Save chart as PNG")
@@ -191,6 +438,13 @@ def main(argv: Optional[List[str]] = None) -> None:
     if not os.path.exists(csv_path):
         raise SystemExit(f"CSV not found: {csv_path}")
 
+    if args.prepare:
+        if pa is None:
+            raise SystemExit("--prepare requires pyarrow")
+        print(f"Parquet dataset: {ensure_parquet(csv_path, overwrite=True)}")
+        if not (args.symbol or args.list_symbols):
+            return
+
     if args.list_symbols:
         syms = list_available_symbols(csv_path)
         if not syms:
@@ -205,21 +459,27 @@ def main(argv: Optional[List[str]] = None) -> None:
         syms = list_available_symbols(csv_path)
         if not syms:
             raise SystemExit("No symbols found; cannot auto-select a symbol.")
-        args.symbol = syms[0]
-        print(f"[info] --symbol not provided; using first symbol found: {args.symbol}")
-
-    df = load_symbol_frame(csv_path, args.symbol, args.start, args.end)
-    out = plot_history(
-        df=df,
-        symbol=args.symbol,
-        outdir=args.outdir,
-        save=bool(args.save),
-        show=not args.no_show,
-        ma_windows=args.ma,
-        fast=args.fast,
-    )
-    if out:
-        print(f"Saved chart: {out}")
+        args.symbol = [syms[0]]
+        print(f"[info] --symbol not provided; using first symbol found: {syms[0]}")
+
+    # Batch runs without a window redraw into one figure instead of building one per symbol
+    fig = plt.figure(figsize=(12, 7)) if args.no_show and len(args.symbol) > 1 else None
+    for symbol in args.symbol:
+        df = load_symbol_frame(csv_path, symbol, args.start, args.end)
+        out = plot_history(
+            df=df,
+            symbol=symbol,
+            outdir=args.outdir,
+            save=bool(args.save),
+            show=not args.no_show,
+            ma_windows=args.ma,
+            fast=args.fast,
+            fig=fig,
+        )
+        if out:
+            print(f"Saved chart: {out}")
+    if fig is not None:
+        plt.close(fig)
 
 
 if __name__ == "__main__":
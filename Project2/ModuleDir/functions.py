@@ -1,3 +1,13 @@
+import numpy as np
+
+# lookup tables for the vectorized decoders, built once at import:
+# digit weights for fields up to 7 characters wide, and the per-year BMI
+# scale and missing-value code (0.01 and a blank field for unlisted years)
+POW10 = 10 ** np.arange(6, -1, -1, dtype=np.int64)
+BMI_SCALE = {0: 0.1, 1: 0.0001}
+BMI_MISSING = {0: 999, 1: 999999, **dict.fromkeys(range(2, 11), 9999)}
+
+
 def fieldDictBuild():
     fieldDict = dict.fromkeys([0, 1, 2, 3, 11, 12, 13, 14])
 
@@ -71,3 +81,117 @@ def getHlth(hlthString):
 
     assert genhlth in (-1, 1, 2, 3, 4, 5, 6)
     return genhlth
+
+
+# memory-maps an extracted fixed-width file and returns its records as a list of
+# (n, recLen) uint8 blocks, recLen including the line terminator; the first
+# block is a zero-copy view of the map, and a final record missing its
+# terminator comes back as a separate one-row block. Raises ValueError if the
+# records are not all the same length, since the fields would then be read
+# from the wrong columns
+def mapRecords(path):
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    newlines = np.flatnonzero(raw[: 1 << 16] == ord("\n"))
+    if newlines.size == 0:
+        del raw
+        raise ValueError(f"no record terminator in the first 64 KiB of {path}")
+    recLen = int(newlines[0]) + 1
+    crlf = recLen > 1 and raw[recLen - 2] == ord("\r")
+    terminator = np.frombuffer(b"\r\n" if crlf else b"\n", dtype=np.uint8)
+
+    nRec = raw.size // recLen
+    records = raw[: nRec * recLen].reshape(nRec, recLen)
+    tail = raw[nRec * recLen :]
+    aligned = (records[:, recLen - terminator.size :] == terminator).all()
+    if not aligned or tail.size not in (0, recLen - terminator.size):
+        del raw, records, tail
+        raise ValueError(f"records in {path} are not all {recLen} bytes long")
+
+    blocks = [records]
+    if tail.size:
+        lastRecord = np.empty(shape=(1, recLen), dtype=np.uint8)
+        lastRecord[0, : tail.size] = tail
+        lastRecord[0, tail.size :] = terminator
+        blocks.append(lastRecord)
+    return blocks
+
+
+# A = X.T @ X is symmetric positive definite once enough distinct records are
+# in, so a Cholesky solve replaces the SVD behind pinv; pinv is only the
+# fallback while A is still singular
+def solveNormal(A, z):
+    try:
+        L = np.linalg.cholesky(A)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(A) @ z
+    return np.linalg.solve(L.T, np.linalg.solve(L, z))
+
+
+# vectorized versions of the decoders above, operating on (n, width) uint8
+# column slices of fixed-width records instead of one string per record
+
+# leading and trailing blanks are trimmed as int() would; a field that is
+# blank, has an embedded blank or has any byte outside '0'..'9' is missing
+# and decodes to -1
+def parseDigits(cols):
+    width = cols.shape[1]
+    isDigit = (cols >= ord("0")) & (cols <= ord("9"))
+    first = np.argmax(isDigit, axis=1)
+    last = width - 1 - np.argmax(isDigit[:, ::-1], axis=1)
+    valid = (
+        isDigit.any(axis=1)
+        & (isDigit | (cols == ord(" "))).all(axis=1)
+        & (isDigit.sum(axis=1) == last - first + 1)
+    )
+
+    # weight each digit by its distance from the field's last digit
+    exponent = np.clip(last[:, None] - np.arange(width), 0, POW10.size - 1)
+    digits = np.where(isDigit, cols.astype(np.int64) - ord("0"), 0)
+    value = (digits * POW10[POW10.size - 1 - exponent]).sum(axis=1)
+    return np.where(valid, value, -1)
+
+
+def getIncomeArray(incomeCols):
+    income = parseDigits(incomeCols)
+    return np.where(income < 0, 9, income)
+
+
+def convertBMIArray(bmiCols, shortYear):
+    raw = parseDigits(bmiCols)
+    keep = (raw >= 0) & (raw != BMI_MISSING.get(shortYear, -1))
+    return np.where(keep, BMI_SCALE.get(shortYear, 0.01) * raw, 0.0)
+
+
+def getEducationArray(educationCols):
+    education = parseDigits(educationCols)
+    return np.where(education < 0, 9, education)
+
+
+def getHlthArray(hlthCols):
+    genhlth = parseDigits(hlthCols)
+    return np.where((genhlth < 0) | (genhlth > 6), -1, genhlth)
+
+
+# fused record parser: decodes the four fields of a chunk of records and writes
+# the rows that pass the STEP 10 filter straight into the preallocated outW
+# buffer as [1, income, education, bmi, genhlth], returning how many rows were
+# written
+def parseBatch(records, shortYear, fields, outW):
+    fEduc = fields["education"]
+    sInc, eInc = fields["income"]
+    sBMI, eBMI = fields["bmi"]
+    fGH = fields["genhlth"]
+
+    education = getEducationArray(records[:, fEduc - 1 : fEduc])
+    income = getIncomeArray(records[:, sInc - 1 : eInc])
+    bmi = convertBMIArray(records[:, sBMI - 1 : eBMI], shortYear)
+    y = getHlthArray(records[:, fGH - 1 : fGH])
+
+    keep = (education < 9) & (income < 9) & (0 < bmi) & (bmi < 99) & (y != -1)
+    m = int(keep.sum())
+    outW[:m, 0] = 1
+    outW[:m, 1] = income[keep]
+    outW[:m, 2] = education[keep]
+    outW[:m, 3] = bmi[keep]
+    outW[:m, 4] = y[keep]
+    return m
@@ -5,9 +5,10 @@ import sys
 import os
 import importlib
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import tempfile
 import zipfile
-from io import TextIOWrapper
 
 # expected to be /Algorithms/ScalableAlgorithms/PythonScripts
 currentDir = pathlib.Path(__file__).absolute()
@@ -28,97 +29,117 @@ dir(functions)
 fieldDict = functions.fieldDictBuild()
 # STEP 3 END
 
-# STEP 4 START
-path = f"{parentDir}/Data/"
-fileList = os.listdir(path)
-print(parentDir)
-print(path)
-print(fileList)
-
 # STEP 11 START
 q = 4
-A = np.zeros(shape=(q, q))
-z = np.matrix(np.zeros(shape=(q, 1)))
-sumSqrs = 0
-n = 0
+
+# records are accumulated CHUNK at a time, so one GEMM covers a whole chunk;
+# the small integer-valued features fit float32, the accumulators stay float64
+CHUNK = 65_536
 # STEP 11 END
-for filename in fileList:
-    try:
-        shortYear = int(filename[6:8])
-        if shortYear < 11:
-            1 / 0
-        year = 2000 + shortYear
-
-        file = path + filename
-        print(filename)
-        fields = fieldDict[shortYear]
-
-        # STEP 5 START
-        fEduc = fields["education"]
-        sInc, eInc = fields["income"]
-        sBMI, eBMI = fields["bmi"]
-        fGH = fields["genhlth"]
-        # STEP 5 END
-
-        # STEP 6 START
-        with zipfile.ZipFile(file) as zf:
-            zipFileList = zf.namelist()
-            assert len(zipFileList) == 1
-            with zf.open(zipFileList[0]) as f:
-                reader = TextIOWrapper(f, encoding="latin-1")
-                for record in reader:
-                    education = functions.getEducation(record[fEduc - 1])
-                    income = functions.getIncome(record[sInc - 1 : eInc])
-                    bmi = functions.convertBMI(record[sBMI - 1 : eBMI], shortYear)
+
+
+# each file's contribution to A, z, sumSqrs and n is additive, so files are
+# processed independently and the driver sums the partial results
+def processFile(file, shortYear, fields):
+    # W holds X with y as an extra last column, so one Gram matrix W.T @ W
+    # carries A = X.T @ X, z = X.T @ y and sumSqrs = y @ y in its blocks
+    G = np.zeros(shape=(q + 1, q + 1))
+    n = 0
+    Wc = np.empty(shape=(CHUNK, q + 1), dtype=np.float32)
+
+    # STEP 5 START
+    # field offsets are unpacked inside functions.parseBatch
+    # STEP 5 END
+
+    # STEP 6 START
+    # extract once and memory-map, so each chunk is a zero-copy row slice
+    with zipfile.ZipFile(file) as zf, tempfile.TemporaryDirectory() as tmp:
+        zipFileList = zf.namelist()
+        assert len(zipFileList) == 1
+        blocks = functions.mapRecords(zf.extract(zipFileList[0], tmp))
+        try:
+            for block in blocks:
+                for start in range(0, len(block), CHUNK):
+                    chunkRecords = block[start : start + CHUNK]
+                    # STEPS 7 - 10 FUSED IN functions.parseBatch
+                    m = functions.parseBatch(chunkRecords, shortYear, fields, Wc)
                     # STEP 6 END
 
-                    # STEP 7 EDITED IN functions.py
-                    # STEP 8 EDITED IN functions.py
-
-                    # STEP 9 START
-                    y = functions.getHlth(record[fGH - 1])
-                    # STEP 9 END
-
-                    # STEP 10 START
-                    try:
-                        if education < 9 and income < 9 and 0 < bmi < 99 and y != -1:
-                            x = np.matrix([1, income, education, bmi]).T
-
-                        else:
-                            1 / 0
-
-                        # STEP 12 START
-                        A += x * x.T
-                        z += x * y
-                        sumSqrs += y**2
-                        n += 1
-                        # STEP 12 END
-
-                        # STEP 13 START
-                        if n % 10_000 == 0 and n != 0:
-                            b = np.linalg.pinv(A) @ z
-                            print("\t".join(str(float(bi[0, 0])) for bi in b))
-                        # STEP 13 END
-                    except ZeroDivisionError:
-                        pass
-                    # STEP 10 END
-
-    except (ValueError, ZeroDivisionError):
-        pass
-# STEP 4 END
-
-# STEP 14 START
-ybar = ybar = z[0, 0] / n
-varEst = (sumSqrs - float((b.T @ z)[0,0])) / (n - q)
-# STEP 14 END
-
-# STEP 15 START
-#rAdj = 1 - ((n - 1)/(n - q)) * ((sumSqrs - float((b.T @ z)[0,0])) / (sumSqrs - n * (ybar**2)))
-rAdj = np.array([[1 - ((n - 1)/(n - q)) * ((sumSqrs - float((b.T @ z)[0,0])) / (sumSqrs - n * (ybar**2))) ]]) # had to change can't be a scalar numpy gets mad
-# STEP 15 END
-
-# STEP 16 START
-bList = [str(round(float(bi[0, 0]), 3)) for bi in b]
-print('\t'.join(('n', 'b0', 'inc', 'edu', 'bmi', 'r^2_adj')))
-print(n, "\t".join(bList), round(float(rAdj[0, 0]), 3), sep="\t")
-# STEP 16 END
\ No newline at end of file
+                    # STEP 12 START
+                    Wm = Wc[:m]
+                    G += np.einsum("ki,kj->ij", Wm, Wm, optimize=True).astype(np.float64)
+                    n += m
+                    # STEP 12 END
+        finally:
+            # release the map before the temporary file is deleted (required on
+            # Windows), also when parsing raised
+            blocks = block = chunkRecords = None
+
+    return G[:q, :q], G[:q, q], float(G[q, q]), n
+
+
+if __name__ == "__main__":
+    # STEP 4 START
+    path = f"{parentDir}/Data/"
+    fileList = os.listdir(path)
+    print(parentDir)
+    print(path)
+    print(fileList)
+
+    A = np.zeros(shape=(q, q))
+    z = np.zeros(shape=q)
+    sumSqrs = 0
+    n = 0
+    nextReport = 1024
+
+    jobs = {}
+    for filename in fileList:
+        try:
+            shortYear = int(filename[6:8])
+            if shortYear < 11:
+                1 / 0
+            year = 2000 + shortYear
+
+            file = path + filename
+            jobs[filename] = (file, shortYear, fieldDict[shortYear])
+        except (ValueError, ZeroDivisionError):
+            pass
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        futures = {filename: pool.submit(processFile, *job) for filename, job in jobs.items()}
+        for filename, future in futures.items():
+            try:
+                Ai, zi, sumSqrsi, ni = future.result()
+            except (ValueError, ZeroDivisionError):
+                continue
+            print(filename)
+            A += Ai
+            z += zi
+            sumSqrs += sumSqrsi
+            n += ni
+
+            # STEP 13 START
+            # running estimate only each time n passes a power of two
+            if n >= nextReport:
+                b = functions.solveNormal(A, z)
+                print("\t".join(str(float(bi)) for bi in b))
+                nextReport = 1 << n.bit_length()
+            # STEP 13 END
+    # STEP 4 END
+
+    b = functions.solveNormal(A, z)
+
+    # STEP 14 START
+    ybar = z[0] / n
+    varEst = (sumSqrs - b @ z) / (n - q)
+    # STEP 14 END
+
+    # STEP 15 START
+    rAdj = 1 - ((n - 1) / (n - q)) * ((sumSqrs - b @ z) / (sumSqrs - n * (ybar**2)))
+    # STEP 15 END
+
+    # STEP 16 START
+    bList = [str(round(float(bi), 3)) for bi in b]
+    print('\t'.join(('n', 'b0', 'inc', 'edu', 'bmi', 'r^2_adj')))
+    print(n, "\t".join(bList), round(float(rAdj), 3), sep="\t")
+    # STEP 16 END